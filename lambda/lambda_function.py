@@ -1,13 +1,118 @@
 import boto3
-from datetime import datetime, timezone, timedelta
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import os
+import csv
+import io
 import json
-import urllib.request
-import urllib.error
+import threading
+import time
+import logging
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+import urllib3
+
+try:
+    import orjson  # optional: faster JSON, provided via a Lambda layer
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Number of IAM users processed concurrently (calls are network-bound)
+IAM_CONCURRENCY = int(os.getenv("IAM_CONCURRENCY", "16"))
+
+# Concurrency for mutating calls (StopInstances batches, key deactivations)
+MUTATION_CONCURRENCY = 8
+
+# StopInstances accepts at most 1000 instance IDs per call
+STOP_INSTANCES_BATCH_SIZE = 1000
+
+# Instance IDs per DescribeInstances call when reading launch times and tags
+DESCRIBE_INSTANCES_BATCH_SIZE = 1000
+
+# Shared client config: keep connections alive and size the pool so worker
+# threads don't wait on sockets (boto3 clients are thread-safe).
+BOTO_CONFIG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=64,
+    retries={"mode": "standard", "max_attempts": 5},
+)
+
+# IAM's control-plane rate limits are easy to hit with many worker threads;
+# adaptive mode rate-limits the shared client client-side and retries throttles.
+IAM_CONFIG = BOTO_CONFIG.merge(Config(retries={"mode": "adaptive", "max_attempts": 10}))
+
+# Clients are built on first use: the three functions share this module, and
+# e.g. the Slack function never calls AWS. Building a client loads its service
+# model, which is cold-start CPU the function pays for.
+_CLIENT_CONFIGS = {
+    "ec2": BOTO_CONFIG,
+    "iam": IAM_CONFIG,
+    "secretsmanager": BOTO_CONFIG,
+}
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _get_client(service):
+    client = _clients.get(service)
+    if client is None:
+        # Client construction is not thread-safe; IAM workers may race here
+        with _clients_lock:
+            client = _clients.get(service)
+            if client is None:
+                client = boto3.client(service, config=_CLIENT_CONFIGS[service])
+                if service == "ec2":
+                    # Only stop_old_ec2_instances calls DescribeInstances
+                    client.meta.events.register(
+                        "before-parse.ec2.DescribeInstances", _trim_describe_instances_response
+                    )
+                _clients[service] = client
+    return client
+
+
+# Clients each handler needs, built (and for EC2, connected) during cold start
+# so the first real call reuses the connection. Lambda sets _HANDLER to e.g.
+# "lambda_function.ec2_handler"; other handlers build both.
+_COLD_START_CLIENTS = {
+    "ec2_handler": ("ec2",),
+    "iam_handler": ("iam",),
+    "slack_handler": (),
+}
+
+# Longest the INIT phase (10 s limit) waits for the EC2 warm-up call
+WARMUP_TIMEOUT_SEC = 2
+
+
+def _warm_up_ec2(ec2):
+    try:
+        ec2.describe_regions(RegionNames=[ec2.meta.region_name])
+    except Exception:
+        pass
+
+
+def _init_clients():
+    handler = os.getenv("_HANDLER")
+    if not handler:
+        # Not running in Lambda (local import, tests): stay lazy, no network calls
+        return
+
+    services = _COLD_START_CLIENTS.get(handler.rpartition(".")[2], ("ec2", "iam"))
+
+    for service in services:
+        _get_client(service)
+
+    if "ec2" in services:
+        # Warm up on the real client so its pool keeps the connection, but in a
+        # daemon thread: a slow or unreachable endpoint (60s timeouts, retries)
+        # must not hold up INIT beyond WARMUP_TIMEOUT_SEC.
+        warmup = threading.Thread(target=_warm_up_ec2, args=(_get_client("ec2"),), daemon=True)
+        warmup.start()
+        warmup.join(WARMUP_TIMEOUT_SEC)
 
-ec2 = boto3.client("ec2")
-iam = boto3.client("iam")
-secretsmanager = boto3.client("secretsmanager")
 
 # DRY_RUN: "true" → log only, no changes. Set to "false" in env to enable.
 DRY_RUN = os.getenv("DRY_RUN", "true").lower() == "true"
@@ -16,10 +121,22 @@ DRY_RUN = os.getenv("DRY_RUN", "true").lower() == "true"
 EC2_FILTER_TAG_KEY = os.getenv("EC2_FILTER_TAG_KEY")       # e.g. "AutoStop"
 EC2_FILTER_TAG_VALUE = os.getenv("EC2_FILTER_TAG_VALUE")   # e.g. "true"
 
+# Stop EC2 instances running longer than this
+MAX_RUNNING_SEC = 24 * 3600
+
+# IAM key thresholds in seconds (compared against plain timestamps)
+SECONDS_PER_DAY = 86400
+INACTIVE_SEC = 60 * SECONDS_PER_DAY  # deactivate keys unused for >60 days
+ROTATE_SEC = 30 * SECONDS_PER_DAY    # rotate active keys older than 30 days
+
 # Optional: restrict IAM key management to specific users
 IAM_ALLOWED_USERS = os.getenv("IAM_ALLOWED_USERS", "")
 IAM_ALLOWED_USERS = {u.strip() for u in IAM_ALLOWED_USERS.split(",") if u.strip()}
 
+# How long to wait for IAM to generate the credential report
+CREDENTIAL_REPORT_POLL_ATTEMPTS = 10
+CREDENTIAL_REPORT_POLL_SECONDS = 2
+
 # Where to store IAM user access keys in Secrets Manager
 # Secret name pattern: <SECRET_NAME_PREFIX><username>/access-key
 SECRET_NAME_PREFIX = os.getenv("SECRET_NAME_PREFIX", "iam/user/")
@@ -27,30 +144,86 @@ SECRET_NAME_PREFIX = os.getenv("SECRET_NAME_PREFIX", "iam/user/")
 # Slack webhook URL (Incoming Webhook)
 SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL")
 
+# urllib3 ships with botocore. The pool lives at module scope so warm
+# invocations reuse the TLS connection to Slack.
+_SLACK_HEADERS = {"Content-Type": "application/json"}
+_http = urllib3.PoolManager(maxsize=2, headers=_SLACK_HEADERS)
+SLACK_TIMEOUT = urllib3.Timeout(connect=1, read=2)
 
-def lambda_handler(event, context):
-    now = datetime.now(timezone.utc)
-    print(f"Lambda started at {now.isoformat()}, DRY_RUN={DRY_RUN}")
 
-    ec2_stats = stop_old_ec2_instances(now)
-    iam_stats = manage_iam_keys(now)
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def json_dumps(obj):
+    """Serialize to UTF-8 JSON bytes; datetimes become ISO 8601 strings."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_json_default).encode("utf-8")
+
+
+def _run_time(event):
+    """
+    Return (now_iso, now_ts) for this run.
+
+    Under Step Functions every task receives the execution start time as
+    "started_at", so all three functions agree on the run timestamp.
+    """
+    started_at = (event or {}).get("started_at")
+    now = datetime.fromisoformat(started_at) if started_at else datetime.now(timezone.utc)
+    return now.isoformat(), now.timestamp()
+
+
+# Step Functions runs ec2_handler and iam_handler in parallel, then passes
+# both results to slack_handler.
+
+def ec2_handler(event, context):
+    now_iso, now_ts = _run_time(event)
+    logger.info("EC2 task started at %s, DRY_RUN=%s", now_iso, DRY_RUN)
+    return stop_old_ec2_instances(now_ts)
+
+
+def iam_handler(event, context):
+    now_iso, now_ts = _run_time(event)
+    logger.info("IAM task started at %s, DRY_RUN=%s", now_iso, DRY_RUN)
+    return manage_iam_keys(now_ts)
+
 
-    print("Lambda run complete.")
+def slack_handler(event, context):
+    now_iso, _ = _run_time(event)
 
     # Build and send Slack summary
-    summary = build_summary(now, ec2_stats, iam_stats)
-    print("Summary:\n" + summary)
+    summary = build_summary(now_iso, event["ec2_stats"], event["iam_stats"])
+    logger.info("Summary:\n%s", summary)
     send_slack_notification(summary)
 
     return {"status": "ok"}
 
 
+def lambda_handler(event, context):
+    """Run all steps serially in one invocation (e.g. for local testing)."""
+    now_iso, now_ts = _run_time(event)
+    logger.info("Lambda started at %s, DRY_RUN=%s", now_iso, DRY_RUN)
+
+    ec2_stats = stop_old_ec2_instances(now_ts)
+    iam_stats = manage_iam_keys(now_ts)
+
+    logger.info("Lambda run complete.")
+
+    return slack_handler(
+        {"started_at": now_iso, "ec2_stats": ec2_stats, "iam_stats": iam_stats},
+        context,
+    )
+
+
 # ---------------------------------------------------------------------------
 # 1) EC2: Stop instances running > 24 hours
 # ---------------------------------------------------------------------------
 
-def stop_old_ec2_instances(now):
-    print("Checking for EC2 instances running > 24 hours...")
+def stop_old_ec2_instances(now_ts):
+    logger.info("Checking for EC2 instances running > 24 hours...")
 
     filters = [
         {"Name": "instance-state-name", "Values": ["running"]}
@@ -63,44 +236,74 @@ def stop_old_ec2_instances(now):
             "Values": [EC2_FILTER_TAG_VALUE]
         })
 
-    paginator = ec2.get_paginator("describe_instances")
-    page_iterator = paginator.paginate(Filters=filters)
+        # Skip enumerating the fleet if no instance carries the tag yet
+        if not instance_tag_exists(EC2_FILTER_TAG_KEY, EC2_FILTER_TAG_VALUE):
+            logger.info("No instances tagged %s=%s; nothing to stop.", EC2_FILTER_TAG_KEY, EC2_FILTER_TAG_VALUE)
+            return {
+                "instances_to_stop": 0,
+                "instances_stopped": 0,
+            }
+
+    if EC2_FILTER_TAG_KEY and EC2_FILTER_TAG_VALUE:
+        # DescribeInstanceStatus can't filter by tag, so a tag-filtered
+        # DescribeInstances walk is cheapest: only tagged instances come back.
+        # 1000 is the DescribeInstances MaxResults cap.
+        batches = [{"Filters": filters, "PaginationConfig": {"PageSize": 1000}}]
+    else:
+        # DescribeInstanceStatus returns a small record per running instance;
+        # the heavier DescribeInstances is then only issued for those IDs.
+        running_ids = list_running_instance_ids()
+        batches = [
+            {"InstanceIds": running_ids[i:i + DESCRIBE_INSTANCES_BATCH_SIZE], "Filters": filters}
+            for i in range(0, len(running_ids), DESCRIBE_INSTANCES_BATCH_SIZE)
+        ]
 
     instances_to_stop = []
+    # Compare plain floats in the loop instead of building timedeltas per instance
+    cutoff_ts = now_ts - MAX_RUNNING_SEC
+
+    # launch-time filter only supports exact/wildcard matches, so age is
+    # checked client-side.
+    paginator = _get_client("ec2").get_paginator("describe_instances")
 
-    for page in page_iterator:
-        for reservation in page.get("Reservations", []):
-            for instance in reservation.get("Instances", []):
-                instance_id = instance["InstanceId"]
-                launch_time = instance["LaunchTime"]  # tz-aware UTC
-                running_duration = now - launch_time
+    for batch in batches:
+        for page in paginator.paginate(**batch):
+            scanned = 0
+            candidates = 0
 
-                print(f"Instance {instance_id} launched at {launch_time}, "
-                      f"running for {running_duration}")
+            for reservation in page.get("Reservations", []):
+                for instance in reservation.get("Instances", []):
+                    scanned += 1
 
-                if running_duration > timedelta(hours=24):
-                    instances_to_stop.append(instance_id)
+                    # LaunchTime is tz-aware UTC
+                    if instance["LaunchTime"].timestamp() < cutoff_ts:
+                        instances_to_stop.append(instance["InstanceId"])
+                        candidates += 1
+
+            # One log line per page instead of one per instance
+            logger.info("instances scanned: %d, candidates: %d", scanned, candidates)
 
     if not instances_to_stop:
-        print("No instances to stop.")
+        logger.info("No instances to stop.")
         return {
             "instances_to_stop": 0,
             "instances_stopped": 0,
         }
 
-    print(f"Instances to stop (>24h): {instances_to_stop}")
+    logger.info("Instances to stop (>24h): %s", instances_to_stop)
 
     instances_stopped = 0
 
     if DRY_RUN:
-        print("DRY_RUN enabled: not calling StopInstances.")
+        logger.info("DRY_RUN enabled: not calling StopInstances.")
     else:
-        try:
-            response = ec2.stop_instances(InstanceIds=instances_to_stop)
-            print("StopInstances response:", response)
-            instances_stopped = len(instances_to_stop)
-        except Exception as e:
-            print(f"Error stopping instances: {e}")
+        # StopInstances takes at most 1000 IDs per call
+        chunks = [
+            instances_to_stop[i:i + STOP_INSTANCES_BATCH_SIZE]
+            for i in range(0, len(instances_to_stop), STOP_INSTANCES_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=MUTATION_CONCURRENCY) as executor:
+            instances_stopped = sum(executor.map(stop_instances_chunk, chunks))
 
     return {
         "instances_to_stop": len(instances_to_stop),
@@ -108,134 +311,400 @@ def stop_old_ec2_instances(now):
     }
 
 
+# Path (below the response root) of each instance element and of the fields we read
+_INSTANCE_PATH = ("reservationSet", "item", "instancesSet", "item")
+_INSTANCE_FIELDS = ("instanceId", "launchTime")
+
+
+def _trim_describe_instances_response(response_dict, **kwargs):
+    """
+    Shrink a raw DescribeInstances XML body to instanceId/launchTime only.
+
+    Full deserialization of tags, ENIs, block devices etc. is the main CPU
+    cost of DescribeInstances in boto3, and only these two fields are used.
+    The body is stream-parsed and replaced with a minimal document before
+    botocore parses it. Error responses are left untouched.
+    """
+    body = response_dict.get("body")
+    if response_dict.get("status_code") != 200 or not isinstance(body, bytes):
+        return
+
+    namespace = ""
+    path = []
+    instances = []
+    current = {}
+    next_token = None
+
+    try:
+        for event, elem in ET.iterparse(io.BytesIO(body), events=("start", "end")):
+            ns, _, tag = elem.tag.rpartition("}")
+            if event == "start":
+                if not path:
+                    namespace = ns.lstrip("{")
+                path.append(tag)
+                continue
+
+            rel_path = tuple(path[1:])
+            if rel_path[:-1] == _INSTANCE_PATH and tag in _INSTANCE_FIELDS:
+                current[tag] = elem.text or ""
+            elif rel_path == _INSTANCE_PATH:
+                instances.append(current)
+                current = {}
+                elem.clear()  # bound memory on large responses
+            elif rel_path == ("nextToken",):
+                next_token = elem.text
+            path.pop()
+    except ET.ParseError as e:
+        # Let botocore handle (and report) the original body
+        logger.warning("Could not pre-parse DescribeInstances response: %s", e)
+        return
+
+    items = "".join(
+        "<item>" + "".join(
+            f"<{field}>{escape(inst[field])}</{field}>" for field in _INSTANCE_FIELDS if field in inst
+        ) + "</item>"
+        for inst in instances
+    )
+    token = f"<nextToken>{escape(next_token)}</nextToken>" if next_token else ""
+    response_dict["body"] = (
+        f'<DescribeInstancesResponse xmlns="{escape(namespace)}">'
+        f"<reservationSet><item><instancesSet>{items}</instancesSet></item></reservationSet>"
+        f"{token}</DescribeInstancesResponse>"
+    ).encode("utf-8")
+
+
+def instance_tag_exists(key, value):
+    try:
+        response = _get_client("ec2").describe_tags(
+            Filters=[
+                {"Name": "resource-type", "Values": ["instance"]},
+                {"Name": "key", "Values": [key]},
+                {"Name": "value", "Values": [value]},
+            ],
+            MaxResults=5,  # API minimum; one match is enough
+        )
+    except Exception as e:
+        # Don't skip the scan just because the pre-check failed
+        logger.error("Error checking for tag %s=%s: %s", key, value, e)
+        return True
+    return bool(response.get("Tags"))
+
+
+def list_running_instance_ids():
+    paginator = _get_client("ec2").get_paginator("describe_instance_status")
+
+    instance_ids = []
+
+    # 1000 is the DescribeInstanceStatus MaxResults cap
+    for page in paginator.paginate(
+        Filters=[{"Name": "instance-state-name", "Values": ["running"]}],
+        IncludeAllInstances=False,
+        PaginationConfig={"PageSize": 1000},
+    ):
+        for status in page.get("InstanceStatuses", []):
+            instance_ids.append(status["InstanceId"])
+
+    return instance_ids
+
+
+def stop_instances_chunk(instance_ids):
+    try:
+        response = _get_client("ec2").stop_instances(InstanceIds=instance_ids)
+        logger.info("StopInstances response: %s", response)
+        return len(instance_ids)
+    except Exception as e:
+        logger.error("Error stopping instances: %s", e)
+        return 0
+
+
 # ---------------------------------------------------------------------------
 # 2 & 3) IAM: Deactivate keys inactive >60 days, rotate keys >30 days
 #     + store rotated keys in Secrets Manager
 # ---------------------------------------------------------------------------
 
-def manage_iam_keys(now):
-    print("Checking IAM access keys...")
+def manage_iam_keys(now_ts):
+    logger.info("Checking IAM access keys...")
 
-    inactive_threshold = timedelta(days=60)
-    rotate_threshold = timedelta(days=30)
+    report = fetch_credential_report()
 
-    paginator = iam.get_paginator("list_users")
+    if report is None:
+        # Fall back to listing users and inspecting every user's keys
+        usernames = list_managed_usernames()
+        pending = usernames
+    else:
+        if IAM_ALLOWED_USERS:
+            usernames = []
+            for username in sorted(IAM_ALLOWED_USERS):
+                if username in report:
+                    usernames.append(username)
+                else:
+                    logger.warning("User %s does not exist.", username)
+        else:
+            usernames = [username for username in report if username != "<root_account>"]
+        pending = []
+        keyless = 0
+        for username in usernames:
+            keys = report_access_keys(report[username])
+            if not keys:
+                # Console-only users; counted here, logged once below
+                keyless += 1
+            elif user_needs_action(keys, now_ts):
+                logger.info("Processing user: %s", username)
+                pending.append(username)
+            else:
+                logger.info("User %s: no key action needed per credential report.", username)
+        logger.info("Users without access keys: %d", keyless)
 
-    users_processed = 0
+    # Existing managed users; the fallback path learns about missing ones below
+    users_processed = len(usernames)
+    users_failed = 0
     keys_deactivated = 0
     keys_rotated = 0
 
-    for page in paginator.paginate():
-        for user in page.get("Users", []):
-            username = user["UserName"]
-
-            if IAM_ALLOWED_USERS and username not in IAM_ALLOWED_USERS:
-                print(f"Skipping user {username} (not in IAM_ALLOWED_USERS).")
+    # Per-user work is independent; each worker returns its counts by value
+    with ThreadPoolExecutor(max_workers=IAM_CONCURRENCY) as executor:
+        futures = [
+            (username, executor.submit(process_user_keys, username, now_ts))
+            for username in pending
+        ]
+        for username, future in futures:
+            # One user's failure (e.g. throttling) must not drop the others' results
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error("Error processing user %s: %s", username, e)
+                users_processed -= 1
+                users_failed += 1
                 continue
-
-            print(f"Processing user: {username}")
-            users_processed += 1
-            d, r = process_user_keys(username, now, inactive_threshold, rotate_threshold)
+            if result is None:
+                users_processed -= 1  # user does not exist
+                continue
+            d, r = result
             keys_deactivated += d
             keys_rotated += r
 
     return {
         "users_processed": users_processed,
+        "users_failed": users_failed,
         "keys_deactivated": keys_deactivated,
         "keys_rotated": keys_rotated,
     }
 
 
-def process_user_keys(username, now, inactive_threshold, rotate_threshold):
-    access_keys = iam.list_access_keys(UserName=username)["AccessKeyMetadata"]
+def list_managed_usernames():
+    if IAM_ALLOWED_USERS:
+        # Only a handful of users are managed: no need to page through all of them
+        logger.info("Managing only IAM_ALLOWED_USERS: %s", sorted(IAM_ALLOWED_USERS))
+        return sorted(IAM_ALLOWED_USERS)
+
+    paginator = _get_client("iam").get_paginator("list_users")
+
+    usernames = []
+
+    # 1000 is the ListUsers MaxItems cap (default page is 100)
+    for page in paginator.paginate(PaginationConfig={"PageSize": 1000}):
+        for user in page.get("Users", []):
+            username = user["UserName"]
+            logger.info("Processing user: %s", username)
+            usernames.append(username)
+
+    return usernames
+
+
+def fetch_credential_report():
+    """
+    Fetch the IAM credential report as {username: row}.
+
+    One report covers every user's key ages and last-used dates, so only
+    users that need changes have to be inspected key by key. IAM may serve a
+    report up to 4 hours old; keys are re-checked live before any change.
+    Returns None if the report cannot be generated.
+    """
+    iam = _get_client("iam")
+
+    try:
+        for _ in range(CREDENTIAL_REPORT_POLL_ATTEMPTS):
+            state = iam.generate_credential_report()["State"]
+            if state == "COMPLETE":
+                break
+            time.sleep(CREDENTIAL_REPORT_POLL_SECONDS)
+        else:
+            logger.warning("Credential report not ready in time; falling back to per-user scan.")
+            return None
+
+        content = iam.get_credential_report()["Content"].decode("utf-8")
+        return {row["user"]: row for row in csv.DictReader(io.StringIO(content))}
+    except Exception as e:
+        logger.error("Error fetching credential report; falling back to per-user scan: %s", e)
+        return None
+
+
+def _parse_report_date(value):
+    # Report uses "N/A" / "no_information" for missing dates
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def report_access_keys(row):
+    """Return (created, last_used, active) for each key slot in a report row."""
+    keys = []
+    for n in (1, 2):
+        # last_rotated is "N/A" when the slot holds no key
+        created = _parse_report_date(row.get(f"access_key_{n}_last_rotated"))
+        if created is None:
+            continue
+
+        # last_used_date is "N/A" for keys that were never used
+        last_used = _parse_report_date(row.get(f"access_key_{n}_last_used_date"))
+        active = row.get(f"access_key_{n}_active") == "true"
+        keys.append((created, last_used, active))
+    return keys
+
+
+def user_needs_action(keys, now_ts):
+    """Mirror the checks in process_user_keys using credential report data."""
+    for created, last_used, active in keys:
+        if now_ts - (last_used or created).timestamp() > INACTIVE_SEC:
+            return True
+
+        if active and now_ts - created.timestamp() > ROTATE_SEC:
+            return True
+
+    return False
+
+
+def process_user_keys(username, now_ts):
+    """Return (deactivated, rotated) counts, or None if the user doesn't exist."""
+    iam = _get_client("iam")
+
+    try:
+        access_keys = iam.list_access_keys(UserName=username)["AccessKeyMetadata"]
+    except iam.exceptions.NoSuchEntityException:
+        # Names from IAM_ALLOWED_USERS are not checked against ListUsers
+        logger.warning("User %s does not exist.", username)
+        return None
 
     if not access_keys:
-        print(f"User {username} has no access keys.")
+        logger.info("User %s has no access keys.", username)
         return 0, 0
 
-    created_new_key = None  # ensure max one new key per user per run
+    inactive_keys = []  # deactivated outright
+    rotate_keys = []    # deactivated only once a replacement key exists
 
-    deactivated_count = 0
-    rotated_count = 0
+    # Fetch last-used info for all keys up front so the round-trips overlap
+    key_ids = [k["AccessKeyId"] for k in access_keys]
+    with ThreadPoolExecutor(max_workers=len(key_ids)) as executor:
+        last_used_map = dict(zip(key_ids, executor.map(
+            lambda kid: iam.get_access_key_last_used(AccessKeyId=kid), key_ids
+        )))
 
     for key_meta in access_keys:
         access_key_id = key_meta["AccessKeyId"]
         status = key_meta["Status"]
         create_date = key_meta["CreateDate"]  # datetime
-        key_age = now - create_date
+        key_age_sec = now_ts - create_date.timestamp()
 
-        print(f"  Key {access_key_id}: status={status}, create_date={create_date}, age={key_age}")
+        logger.info("  User %s key %s: status=%s, create_date=%s, age=%.1f days",
+                    username, access_key_id, status, create_date, key_age_sec / SECONDS_PER_DAY)
 
         # Inactivity check (>60 days)
-        last_used_resp = iam.get_access_key_last_used(AccessKeyId=access_key_id)
+        last_used_resp = last_used_map[access_key_id]
         last_used = last_used_resp.get("AccessKeyLastUsed", {}).get("LastUsedDate")
 
         if last_used:
-            inactivity_age = now - last_used
-            print(f"    Last used at {last_used}, inactivity_age={inactivity_age}")
+            inactivity_sec = now_ts - last_used.timestamp()
+            logger.info("    User %s key %s last used at %s, inactivity_age=%.1f days",
+                        username, access_key_id, last_used, inactivity_sec / SECONDS_PER_DAY)
         else:
-            inactivity_age = now - create_date
-            print(f"    Never used, treating inactivity_age={inactivity_age}")
+            inactivity_sec = key_age_sec
+            logger.info("    User %s key %s never used, treating inactivity_age=%.1f days",
+                        username, access_key_id, inactivity_sec / SECONDS_PER_DAY)
 
         # Deactivate keys inactive >60 days
-        if inactivity_age > inactive_threshold:
-            print(f"    Key {access_key_id} inactive >60 days → will deactivate.")
-            if not DRY_RUN:
-                deactivate_key(username, access_key_id)
-            else:
-                print(f"    DRY_RUN: would deactivate inactive key {access_key_id}.")
-            deactivated_count += 1
+        if inactivity_sec > INACTIVE_SEC:
+            logger.info("    User %s key %s inactive >60 days → will deactivate.", username, access_key_id)
+            if DRY_RUN:
+                logger.info("    DRY_RUN: would deactivate inactive key %s for user %s.", access_key_id, username)
+            inactive_keys.append(access_key_id)
             # no rotation for inactive keys
             continue
 
         # Rotate keys older than 30 days (still Active)
-        if status == "Active" and key_age > rotate_threshold:
-            print(f"    Key {access_key_id} is active and older than 30 days → rotation needed")
+        if status == "Active" and key_age_sec > ROTATE_SEC:
+            logger.info("    User %s key %s is active and older than 30 days → rotation needed",
+                        username, access_key_id)
 
-            if created_new_key is None:
-                if not DRY_RUN:
-                    created_new_key = create_new_access_key(username)
-                else:
-                    print("    DRY_RUN: would create a new access key for this user.")
-                    created_new_key = "DRY_RUN_PLACEHOLDER"
+            if DRY_RUN:
+                if not rotate_keys:  # max one new key per user per run
+                    logger.info("    DRY_RUN: would create a new access key for user %s.", username)
+                logger.info("    DRY_RUN: would deactivate old key %s for user %s after rotation.",
+                            access_key_id, username)
+            rotate_keys.append(access_key_id)
 
-            if not DRY_RUN:
-                deactivate_key(username, access_key_id)
-            else:
-                print(f"    DRY_RUN: would deactivate old key {access_key_id} after rotation.")
-            rotated_count += 1
+    if DRY_RUN:
+        return len(inactive_keys), len(rotate_keys)
+
+    # Mutation phase: the replacement key is created before any old key is
+    # deactivated, then the deactivations are issued concurrently.
+    keys_to_deactivate = list(inactive_keys)
+    rotated_count = 0
 
-    return deactivated_count, rotated_count
+    if rotate_keys:
+        if create_new_access_key(username) is not None:
+            keys_to_deactivate.extend(rotate_keys)
+            rotated_count = len(rotate_keys)
+        else:
+            # Never leave the user without a working key
+            logger.error("    No replacement key for user %s; keeping keys %s active.", username, rotate_keys)
+
+    if keys_to_deactivate:
+        with ThreadPoolExecutor(max_workers=MUTATION_CONCURRENCY) as executor:
+            for access_key_id in keys_to_deactivate:
+                executor.submit(deactivate_key, username, access_key_id)
+
+    return len(inactive_keys), rotated_count
 
 
 def deactivate_key(username, access_key_id):
     try:
-        print(f"    Deactivating key {access_key_id} for user {username}...")
-        iam.update_access_key(
+        logger.info("    Deactivating key %s for user %s...", access_key_id, username)
+        _get_client("iam").update_access_key(
             UserName=username,
             AccessKeyId=access_key_id,
             Status="Inactive"
         )
-        print(f"    Key {access_key_id} deactivated.")
+        logger.info("    Key %s deactivated for user %s.", access_key_id, username)
     except Exception as e:
-        print(f"    Error deactivating key {access_key_id} for user {username}: {e}")
+        logger.error("    Error deactivating key %s for user %s: %s", access_key_id, username, e)
 
 
 def create_new_access_key(username):
+    iam = _get_client("iam")
+
     try:
-        print(f"    Creating new access key for user {username}...")
+        logger.info("    Creating new access key for user %s...", username)
         resp = iam.create_access_key(UserName=username)
         access_key = resp["AccessKey"]
         new_key_id = access_key["AccessKeyId"]
 
-        print(f"    Created new key {new_key_id} for user {username}.")
+        logger.info("    Created new key %s for user %s.", new_key_id, username)
 
-        # Store in Secrets Manager (no secret values in logs)
-        store_access_key_in_secrets_manager(username, access_key)
+        # Store in Secrets Manager (no secret values in logs). If it can't be
+        # stored nobody can use the new key: delete it so it doesn't linger
+        # as an unheld credential that also blocks future rotations (2-key limit).
+        if not store_access_key_in_secrets_manager(username, access_key):
+            try:
+                iam.delete_access_key(UserName=username, AccessKeyId=new_key_id)
+                logger.info("    Deleted unstored new key %s for user %s.", new_key_id, username)
+            except Exception as e:
+                logger.error("    Error deleting unstored new key %s for user %s: %s", new_key_id, username, e)
+            return None
 
         return access_key
     except Exception as e:
-        print(f"    Error creating new access key for user {username}: {e}")
+        logger.error("    Error creating new access key for user %s: %s", username, e)
         return None
 
 
@@ -245,56 +714,54 @@ def store_access_key_in_secrets_manager(username, access_key):
 
     Secret name: <SECRET_NAME_PREFIX><username>/access-key
     Secret value: JSON with AccessKeyId, SecretAccessKey, CreateDate
+    Returns True if the key was stored.
     """
     secret_name = f"{SECRET_NAME_PREFIX}{username}/access-key"
 
-    # Convert CreateDate to ISO string if present
-    create_date = access_key.get("CreateDate")
-    if isinstance(create_date, datetime):
-        create_date_str = create_date.isoformat()
-    else:
-        create_date_str = str(create_date) if create_date else None
-
     payload = {
         "UserName": username,
         "AccessKeyId": access_key["AccessKeyId"],
         "SecretAccessKey": access_key["SecretAccessKey"],  # DO NOT log this
-        "CreateDate": create_date_str,
+        "CreateDate": access_key.get("CreateDate"),  # serialized as ISO 8601
     }
 
-    secret_string = json.dumps(payload)
+    secret_string = json_dumps(payload).decode("utf-8")
+    secretsmanager = _get_client("secretsmanager")
 
     try:
-        # First try to create the secret
-        print(f"    Storing new access key for {username} in Secrets Manager secret '{secret_name}'...")
-        secretsmanager.create_secret(
-            Name=secret_name,
+        # Steady state: the secret already exists → write new version
+        logger.info("    Storing new access key for %s in Secrets Manager secret '%s'...", username, secret_name)
+        secretsmanager.put_secret_value(
+            SecretId=secret_name,
             SecretString=secret_string,
         )
-        print(f"    Created new secret '{secret_name}'.")
-    except secretsmanager.exceptions.ResourceExistsException:
-        # Secret already exists → write new version
+        logger.info("    Updated secret '%s' with new key version.", secret_name)
+        return True
+    except secretsmanager.exceptions.ResourceNotFoundException:
+        # First rotation for this user → create the secret
         try:
-            print(f"    Secret '{secret_name}' already exists, writing new version...")
-            secretsmanager.put_secret_value(
-                SecretId=secret_name,
+            logger.info("    Secret '%s' does not exist, creating it...", secret_name)
+            secretsmanager.create_secret(
+                Name=secret_name,
                 SecretString=secret_string,
             )
-            print(f"    Updated secret '{secret_name}' with new key version.")
+            logger.info("    Created new secret '%s'.", secret_name)
+            return True
         except Exception as e:
-            print(f"    Error updating secret '{secret_name}': {e}")
+            logger.error("    Error creating secret '%s': %s", secret_name, e)
     except Exception as e:
-        print(f"    Error creating secret '{secret_name}': {e}")
+        logger.error("    Error updating secret '%s': %s", secret_name, e)
+    return False
 
 
 # ---------------------------------------------------------------------------
 # Slack helpers
 # ---------------------------------------------------------------------------
 
-def build_summary(now, ec2_stats, iam_stats):
-    lines = [
+def build_summary(now_iso, ec2_stats, iam_stats):
+    lines = (
         f"*Cost Guardian Lambda run*",
-        f"Time (UTC): `{now.isoformat()}`",
+        f"Time (UTC): `{now_iso}`",
         f"DRY_RUN: `{DRY_RUN}`",
         "",
         f"*EC2*",
@@ -303,35 +770,46 @@ def build_summary(now, ec2_stats, iam_stats):
         "",
         f"*IAM Access Keys*",
         f"- Users processed: `{iam_stats['users_processed']}`",
+        f"- Users failed (see logs): `{iam_stats['users_failed']}`",
         f"- Keys deactivated (>60d inactive): `{iam_stats['keys_deactivated']}`",
         f"- Keys rotated (>30d age): `{iam_stats['keys_rotated']}`",
-    ]
+    )
     # Use Slack's basic markdown
     return "\n".join(lines)
 
 
 def send_slack_notification(text):
     if not SLACK_WEBHOOK_URL:
-        print("SLACK_WEBHOOK_URL not set; skipping Slack notification.")
+        logger.info("SLACK_WEBHOOK_URL not set; skipping Slack notification.")
         return
 
     payload = {"text": text}
 
     try:
-        req = urllib.request.Request(
+        # Short timeout and no retries so a slow Slack doesn't extend the
+        # billed duration. The body is only read on errors.
+        resp = _http.request(
+            "POST",
             SLACK_WEBHOOK_URL,
-            data=json.dumps(payload).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST",
+            body=json_dumps(payload),
+            timeout=SLACK_TIMEOUT,
+            retries=False,
+            preload_content=False,
         )
-        with urllib.request.urlopen(req) as resp:
-            body = resp.read().decode("utf-8")
-            print(f"Slack response status={resp.status}, body={body}")
-    except urllib.error.HTTPError as e:
-        print(f"HTTP error sending Slack notification: {e.code} {e.reason}")
-        try:
-            print(e.read().decode("utf-8"))
-        except Exception:
-            pass
+        if resp.status >= 400:
+            # Slack explains failures in the body (e.g. invalid_token, no_service)
+            body = resp.data.decode("utf-8", errors="replace")
+            resp.release_conn()
+            logger.error("HTTP error sending Slack notification: %s %s", resp.status, resp.reason)
+            logger.error("%s", body)
+        else:
+            # Discard the (tiny) body so the pooled connection can be reused
+            resp.drain_conn()
+            resp.release_conn()
+            logger.info("Slack response status=%s", resp.status)
     except Exception as e:
-        print(f"Error sending Slack notification: {e}")
+        logger.error("Error sending Slack notification: %s", e)
+
+
+# Runs last so every helper the clients reference is defined
+_init_clients()
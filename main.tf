@@ -24,12 +24,8 @@ data "archive_file" "lambda_zip" {
   output_path = "${path.module}/lambda/lambda.zip"
 }
 
-# IAM role for Lambda
-resource "aws_iam_role" "lambda_role" {
-  name               = "${var.lambda_name}-role"
-  assume_role_policy = data.aws_iam_policy_document.lambda_assume_role.json
-}
-
+# IAM roles for Lambda – one per task, each with only the permissions its
+# function uses.
 data "aws_iam_policy_document" "lambda_assume_role" {
   statement {
     effect = "Allow"
@@ -43,19 +39,61 @@ data "aws_iam_policy_document" "lambda_assume_role" {
   }
 }
 
-# Inline policy for EC2 + IAM key management + Secrets Manager + logs
-data "aws_iam_policy_document" "lambda_policy" {
+# CloudWatch Logs – needed by every function
+data "aws_iam_policy_document" "lambda_logs" {
+  statement {
+    sid    = "Logs"
+    effect = "Allow"
+
+    actions = [
+      "logs:CreateLogGroup",
+      "logs:CreateLogStream",
+      "logs:PutLogEvents"
+    ]
+
+    resources = ["*"]
+  }
+}
+
+# EC2 task: find and stop old instances
+resource "aws_iam_role" "ec2_lambda_role" {
+  name               = "${var.lambda_name}-ec2-role"
+  assume_role_policy = data.aws_iam_policy_document.lambda_assume_role.json
+}
+
+data "aws_iam_policy_document" "ec2_lambda_policy" {
+  source_policy_documents = [data.aws_iam_policy_document.lambda_logs.json]
+
   statement {
     sid    = "Ec2Control"
     effect = "Allow"
 
     actions = [
       "ec2:DescribeInstances",
+      "ec2:DescribeInstanceStatus",
+      "ec2:DescribeRegions",
+      "ec2:DescribeTags",
       "ec2:StopInstances",
     ]
 
     resources = ["*"]
   }
+}
+
+resource "aws_iam_role_policy" "ec2_lambda_inline" {
+  name   = "${var.lambda_name}-ec2-policy"
+  role   = aws_iam_role.ec2_lambda_role.id
+  policy = data.aws_iam_policy_document.ec2_lambda_policy.json
+}
+
+# IAM task: key management + Secrets Manager
+resource "aws_iam_role" "iam_lambda_role" {
+  name               = "${var.lambda_name}-iam-role"
+  assume_role_policy = data.aws_iam_policy_document.lambda_assume_role.json
+}
+
+data "aws_iam_policy_document" "iam_lambda_policy" {
+  source_policy_documents = [data.aws_iam_policy_document.lambda_logs.json]
 
   statement {
     sid    = "IamKeyManagement"
@@ -63,10 +101,13 @@ data "aws_iam_policy_document" "lambda_policy" {
 
     actions = [
       "iam:ListUsers",
+      "iam:GenerateCredentialReport",
+      "iam:GetCredentialReport",
       "iam:ListAccessKeys",
       "iam:GetAccessKeyLastUsed",
       "iam:UpdateAccessKey",
-      "iam:CreateAccessKey"
+      "iam:CreateAccessKey",
+      "iam:DeleteAccessKey"
     ]
 
     resources = ["*"]
@@ -86,38 +127,62 @@ data "aws_iam_policy_document" "lambda_policy" {
 
     resources = ["*"]
   }
+}
 
-  statement {
-    sid    = "Logs"
-    effect = "Allow"
+resource "aws_iam_role_policy" "iam_lambda_inline" {
+  name   = "${var.lambda_name}-iam-policy"
+  role   = aws_iam_role.iam_lambda_role.id
+  policy = data.aws_iam_policy_document.iam_lambda_policy.json
+}
 
-    actions = [
-      "logs:CreateLogGroup",
-      "logs:CreateLogStream",
-      "logs:PutLogEvents"
-    ]
+# Slack task: only posts to the webhook, so logs only
+resource "aws_iam_role" "slack_lambda_role" {
+  name               = "${var.lambda_name}-slack-role"
+  assume_role_policy = data.aws_iam_policy_document.lambda_assume_role.json
+}
 
-    resources = ["*"]
-  }
+resource "aws_iam_role_policy" "slack_lambda_inline" {
+  name   = "${var.lambda_name}-slack-policy"
+  role   = aws_iam_role.slack_lambda_role.id
+  policy = data.aws_iam_policy_document.lambda_logs.json
 }
 
-resource "aws_iam_role_policy" "lambda_inline" {
-  name   = "${var.lambda_name}-policy"
-  role   = aws_iam_role.lambda_role.id
-  policy = data.aws_iam_policy_document.lambda_policy.json
+# Lambda functions – one per task, all built from the same package.
+# EC2 and IAM have no data dependency, so Step Functions runs them in
+# parallel and the Slack task summarizes both.
+locals {
+  lambda_tasks = {
+    ec2 = {
+      handler = "lambda_function.ec2_handler"
+      role    = aws_iam_role.ec2_lambda_role.arn
+      timeout = 900 # 15 minutes
+    }
+    iam = {
+      handler = "lambda_function.iam_handler"
+      role    = aws_iam_role.iam_lambda_role.arn
+      timeout = 900 # 15 minutes
+    }
+    slack = {
+      handler = "lambda_function.slack_handler"
+      role    = aws_iam_role.slack_lambda_role.arn
+      timeout = 30
+    }
+  }
 }
 
-# Lambda function
-resource "aws_lambda_function" "this" {
-  function_name = var.lambda_name
-  role          = aws_iam_role.lambda_role.arn
-  handler       = "lambda_function.lambda_handler"
+resource "aws_lambda_function" "task" {
+  for_each = local.lambda_tasks
+
+  function_name = "${var.lambda_name}-${each.key}"
+  role          = each.value.role
+  handler       = each.value.handler
   runtime       = "python3.12"
+  layers        = var.lambda_layers
 
   filename         = data.archive_file.lambda_zip.output_path
   source_code_hash = data.archive_file.lambda_zip.output_base64sha256
 
-  timeout = 900 # 15 minutes
+  timeout = each.value.timeout
 
   environment {
     variables = {
@@ -125,17 +190,140 @@ resource "aws_lambda_function" "this" {
       EC2_FILTER_TAG_KEY   = var.ec2_filter_tag_key
       EC2_FILTER_TAG_VALUE = var.ec2_filter_tag_value
       IAM_ALLOWED_USERS    = join(",", var.iam_allowed_users)
+      IAM_CONCURRENCY      = tostring(var.iam_concurrency)
       SECRET_NAME_PREFIX   = var.secret_name_prefix
       SLACK_WEBHOOK_URL    = var.slack_webhook_url
     }
   }
 }
 
+# ---------------------------------------------------------------------------
+# Step Functions – EC2 and IAM in parallel, then Slack summary
+# ---------------------------------------------------------------------------
+
+resource "aws_iam_role" "state_machine" {
+  name = "${var.lambda_name}-sfn-role"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        Effect = "Allow"
+        Principal = {
+          Service = "states.amazonaws.com"
+        }
+        Action = "sts:AssumeRole"
+      }
+    ]
+  })
+}
+
+data "aws_iam_policy_document" "state_machine" {
+  statement {
+    effect = "Allow"
+
+    actions = [
+      "lambda:InvokeFunction"
+    ]
+
+    resources = [for fn in aws_lambda_function.task : fn.arn]
+  }
+}
+
+resource "aws_iam_role_policy" "state_machine" {
+  name   = "${var.lambda_name}-sfn-policy"
+  role   = aws_iam_role.state_machine.id
+  policy = data.aws_iam_policy_document.state_machine.json
+}
+
+locals {
+  # Retry transient Lambda invoke errors on every task
+  lambda_retry = [
+    {
+      ErrorEquals     = ["Lambda.ServiceException", "Lambda.AWSLambdaException", "Lambda.SdkClientException", "Lambda.TooManyRequestsException"]
+      IntervalSeconds = 2
+      MaxAttempts     = 3
+      BackoffRate     = 2
+    }
+  ]
+}
+
+resource "aws_sfn_state_machine" "this" {
+  name     = var.lambda_name
+  role_arn = aws_iam_role.state_machine.arn
+
+  definition = jsonencode({
+    Comment = "Stop old EC2 instances and manage IAM keys in parallel, then notify Slack."
+    StartAt = "Scan"
+    States = {
+      Scan = {
+        Type = "Parallel"
+        Branches = [
+          {
+            StartAt = "EC2"
+            States = {
+              # Each task gets the execution start time so all agree on the run timestamp
+              EC2 = {
+                Type     = "Task"
+                Resource = "arn:aws:states:::lambda:invoke"
+                Parameters = {
+                  FunctionName = aws_lambda_function.task["ec2"].arn
+                  Payload = {
+                    "started_at.$" = "$$.Execution.StartTime"
+                  }
+                }
+                OutputPath = "$.Payload"
+                Retry      = local.lambda_retry
+                End        = true
+              }
+            }
+          },
+          {
+            StartAt = "IAM"
+            States = {
+              IAM = {
+                Type     = "Task"
+                Resource = "arn:aws:states:::lambda:invoke"
+                Parameters = {
+                  FunctionName = aws_lambda_function.task["iam"].arn
+                  Payload = {
+                    "started_at.$" = "$$.Execution.StartTime"
+                  }
+                }
+                OutputPath = "$.Payload"
+                Retry      = local.lambda_retry
+                End        = true
+              }
+            }
+          }
+        ]
+        Next = "Slack"
+      }
+      # Parallel output is [ec2_stats, iam_stats], in branch order
+      Slack = {
+        Type     = "Task"
+        Resource = "arn:aws:states:::lambda:invoke"
+        Parameters = {
+          FunctionName = aws_lambda_function.task["slack"].arn
+          Payload = {
+            "started_at.$" = "$$.Execution.StartTime"
+            "ec2_stats.$"  = "$[0]"
+            "iam_stats.$"  = "$[1]"
+          }
+        }
+        OutputPath = "$.Payload"
+        Retry      = local.lambda_retry
+        End        = true
+      }
+    }
+  })
+}
+
 # ---------------------------------------------------------------------------
 # EventBridge Scheduler – 1am America/New_York, timezone-aware
 # ---------------------------------------------------------------------------
 
-# Execution role for the Scheduler – lets scheduler invoke the Lambda
+# Execution role for the Scheduler – lets scheduler start the state machine
 resource "aws_iam_role" "scheduler_lambda" {
   name = "${var.lambda_name}-scheduler-role"
 
@@ -158,11 +346,11 @@ data "aws_iam_policy_document" "scheduler_lambda" {
     effect = "Allow"
 
     actions = [
-      "lambda:InvokeFunction"
+      "states:StartExecution"
     ]
 
     resources = [
-      aws_lambda_function.this.arn
+      aws_sfn_state_machine.this.arn
     ]
   }
 }
@@ -190,10 +378,10 @@ resource "aws_scheduler_schedule" "daily_1am_est" {
   }
 
   target {
-    arn      = aws_lambda_function.this.arn
+    arn      = aws_sfn_state_machine.this.arn
     role_arn = aws_iam_role.scheduler_lambda.arn
 
-    # Empty JSON event – handler doesn't need any event data
+    # Empty JSON input – tasks read the run time from the execution context
     input = jsonencode({})
   }
 }
@@ -1,11 +1,16 @@
-output "lambda_name" {
-  description = "Name of the Lambda function"
-  value       = aws_lambda_function.this.function_name
+output "lambda_names" {
+  description = "Names of the Lambda functions, keyed by task (ec2, iam, slack)"
+  value       = { for task, fn in aws_lambda_function.task : task => fn.function_name }
 }
 
-output "lambda_arn" {
-  description = "ARN of the Lambda function"
-  value       = aws_lambda_function.this.arn
+output "lambda_arns" {
+  description = "ARNs of the Lambda functions, keyed by task (ec2, iam, slack)"
+  value       = { for task, fn in aws_lambda_function.task : task => fn.arn }
+}
+
+output "state_machine_arn" {
+  description = "ARN of the Step Functions state machine that runs the tasks"
+  value       = aws_sfn_state_machine.this.arn
 }
 
 output "schedule_name" {
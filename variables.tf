@@ -5,7 +5,7 @@ variable "region" {
 }
 
 variable "lambda_name" {
-  description = "Name of the Lambda function"
+  description = "Base name for the Lambda functions (suffixed -ec2/-iam/-slack) and the state machine"
   type        = string
   default     = "cost-guardian-lambda"
 }
@@ -34,6 +34,12 @@ variable "iam_allowed_users" {
   default     = []
 }
 
+variable "iam_concurrency" {
+  description = "Number of IAM users whose access keys are processed concurrently."
+  type        = number
+  default     = 16
+}
+
 variable "secret_name_prefix" {
   description = "Prefix for Secrets Manager secret names for IAM access keys (e.g. 'iam/user/')."
   type        = string
@@ -45,3 +51,9 @@ variable "slack_webhook_url" {
   type        = string
   default     = ""
 }
+
+variable "lambda_layers" {
+  description = "Optional Lambda layer ARNs to attach (e.g. a layer providing orjson for faster JSON encoding)."
+  type        = list(string)
+  default     = []
+}